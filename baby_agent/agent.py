@@ -4,22 +4,35 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from collections.abc import Awaitable, Callable
 from typing import Any
 
 import anthropic
+import httpx
+import orjson
 
 from .config import settings
 from .huckleberry import HuckleberryManager
 from .prompts import build_system_prompt
-from .tools import TOOL_DEFINITIONS, dispatch_tool
+from .tools import READ_ONLY_TOOLS, TOOL_DEFINITIONS, dispatch_tool, select_tools
 
 log = logging.getLogger(__name__)
 
-_client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
+# One pooled HTTP/2 connection shared by every Anthropic client in the app, so
+# the agent and the conversation-done classifier multiplex over one TLS session.
+http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=60),
+)
+
+_client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key, http_client=http_client)
 
 MODEL = settings.claude_model
 MAX_ITERATIONS = 10
 
+# Cap concurrent Huckleberry calls when the model emits a burst of tool_use blocks
+_TOOL_SEM = asyncio.Semaphore(8)
+
 
 def _thinking_params(model: str) -> dict | None:
     """Return the appropriate thinking parameter for the given model, or None."""
@@ -30,6 +43,25 @@ def _thinking_params(model: str) -> dict | None:
     return {"type": "enabled", "budget_tokens": 10000}
 
 
+def _drops_prior_thinking(model: str) -> bool:
+    """Return True if the model discards thinking blocks from earlier turns server-side.
+
+    Opus 4.5 and later keep prior-turn thinking in context, so for them (and
+    any model not listed) history is replayed as-is.
+    """
+    return model.startswith((
+        "claude-3-7-sonnet",
+        "claude-sonnet-4-0", "claude-sonnet-4-2025", "claude-sonnet-4-5",
+        "claude-opus-4-0", "claude-opus-4-2025", "claude-opus-4-1",
+    ))
+
+
+# MODEL is fixed for the process, so resolve the thinking kwargs once
+_THINKING = _thinking_params(MODEL)
+_MSG_KW: dict[str, Any] = {"thinking": _THINKING} if _THINKING else {}
+_STRIP_THINKING = _drops_prior_thinking(MODEL)
+
+
 def _serialize_content_blocks(blocks: list[Any]) -> list[dict[str, Any]]:
     """Convert Anthropic SDK content block objects to plain dicts for storage.
 
@@ -38,8 +70,12 @@ def _serialize_content_blocks(blocks: list[Any]) -> list[dict[str, Any]]:
     """
     serialized: list[dict[str, Any]] = []
     for block in blocks:
-        if hasattr(block, "model_dump"):
-            serialized.append(block.model_dump())
+        if isinstance(block, dict):
+            serialized.append(block)
+            continue
+        dump = getattr(block, "model_dump", None)
+        if dump is not None:
+            serialized.append(dump())
         elif hasattr(block, "__dict__"):
             serialized.append(dict(block.__dict__))
         else:
@@ -47,17 +83,65 @@ def _serialize_content_blocks(blocks: list[Any]) -> list[dict[str, Any]]:
     return serialized
 
 
+_THINKING_TYPES = frozenset({"thinking", "redacted_thinking"})
+
+
+def _strip_thinking(history: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Drop thinking blocks from completed turns.
+
+    Only for models where _drops_prior_thinking is True: those ignore older
+    thinking blocks server-side, so sending them again only costs bandwidth.
+    Blocks from the in-flight tool-use loop are appended after this and kept.
+    """
+    stripped: list[dict[str, Any]] = []
+    for msg in history:
+        content = msg.get("content")
+        if msg.get("role") == "assistant" and isinstance(content, list):
+            kept = [b for b in content if not (isinstance(b, dict) and b.get("type") in _THINKING_TYPES)]
+            if kept and len(kept) != len(content):
+                msg = {**msg, "content": kept}
+        stripped.append(msg)
+    return stripped
+
+
+def used_only_read_tools(messages: list[dict[str, Any]]) -> bool:
+    """Return True if no assistant message in ``messages`` called a tool outside READ_ONLY_TOOLS."""
+    for msg in messages:
+        content = msg.get("content")
+        if msg.get("role") != "assistant" or not isinstance(content, list):
+            continue
+        for block in content:
+            if block.get("type") == "tool_use" and block.get("name") not in READ_ONLY_TOOLS:
+                return False
+    return True
+
+
+def _tool_result_text(result: Any) -> str:
+    """Compact JSON for tool results (smaller than repr and keeps structure)."""
+    return orjson.dumps(result, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 async def run_turn(
     user_message: str,
     history: list[dict[str, Any]],
     manager: HuckleberryManager,
+    on_text: Callable[[int, str], Awaitable[None]] | None = None,
 ) -> tuple[str, list[dict[str, Any]]]:
     """Run one conversational turn and return (reply_text, updated_history).
 
+    Responses are streamed from the API; text deltas are forwarded to
+    ``on_text`` as they arrive so callers can surface the first tokens
+    before the full reply has been generated. Every model call streams, so
+    text written before a tool call ("Let me check...") arrives too, tagged
+    with an earlier iteration number than the reply's; only the last
+    iteration's text makes up reply_text.
+
     Args:
         user_message: The raw text from the user/Siri.
         history: The full conversation history so far (mutated in place, also returned).
         manager: The HuckleberryManager singleton for tool execution.
+        on_text: Optional async callback invoked as ``on_text(iteration, delta)``
+            with each streamed text delta; ``iteration`` counts model calls from 0.
 
     Returns:
         (reply_text, updated_history)
@@ -69,23 +153,31 @@ async def run_turn(
     system_prompt = build_system_prompt(current_state, child_name, child_uid, settings.huckleberry_timezone)
 
     # Append user message to working history
-    working_history = list(history)
+    working_history = _strip_thinking(history) if _STRIP_THINKING else list(history)
     working_history.append({"role": "user", "content": user_message})
 
+    # Send only the tools the message plausibly needs, and the same list on
+    # every iteration: tools lead the cached prefix, so switching lists mid-turn
+    # would pay a second cache write.
+    tools = select_tools(user_message) if settings.tool_routing_enabled else TOOL_DEFINITIONS
+
     reply_text = ""
 
     for iteration in range(MAX_ITERATIONS):
         log.debug("Agent iteration %d/%d", iteration + 1, MAX_ITERATIONS)
 
-        thinking = _thinking_params(MODEL)
-        response = await _client.messages.create(
+        async with _client.messages.stream(
             model=MODEL,
             max_tokens=16000,
-            **({"thinking": thinking} if thinking else {}),
+            **_MSG_KW,
             system=system_prompt,
-            tools=TOOL_DEFINITIONS,
+            tools=tools,
             messages=working_history,
-        )
+        ) as stream:
+            async for text in stream.text_stream:
+                if on_text is not None:
+                    await on_text(iteration, text)
+            response = await stream.get_final_message()
 
         # Serialize full content block list (including thinking blocks)
         serialized_blocks = _serialize_content_blocks(response.content)
@@ -110,6 +202,13 @@ async def run_turn(
                 or (isinstance(b, dict) and b.get("type") == "tool_use")
             ]
 
+            # Identical read-only calls in the same burst share one dispatch
+            reads: dict[str, asyncio.Task] = {}
+
+            async def _dispatch(name: str, inputs: dict[str, Any]) -> dict[str, Any]:
+                async with _TOOL_SEM:
+                    return await dispatch_tool(name, inputs, manager)
+
             # Execute all tool calls concurrently
             async def _execute(block) -> dict[str, Any]:
                 if hasattr(block, "name"):
@@ -118,10 +217,24 @@ async def run_turn(
                     name = block["name"]
                     tool_id = block["id"]
                     inputs = block.get("input", {})
-                result = await dispatch_tool(name, inputs, manager)
-                return {"type": "tool_result", "tool_use_id": tool_id, "content": str(result)}
-
-            tool_results = await asyncio.gather(*[_execute(b) for b in tool_use_blocks])
+                if name in READ_ONLY_TOOLS:
+                    key = f"{name}:{sorted(inputs.items())!r}"
+                    task = reads.get(key)
+                    if task is None:
+                        task = reads[key] = asyncio.create_task(_dispatch(name, inputs))
+                    result = await task
+                else:
+                    result = await _dispatch(name, inputs)
+                return {"type": "tool_result", "tool_use_id": tool_id, "content": _tool_result_text(result)}
+
+            try:
+                tool_results = await asyncio.gather(*[_execute(b) for b in tool_use_blocks])
+            finally:
+                # gather doesn't own these tasks: if it is cancelled or a call
+                # fails, stop any shared reads still holding a _TOOL_SEM slot
+                for task in reads.values():
+                    if not task.done():
+                        task.cancel()
 
             working_history.append({"role": "user", "content": list(tool_results)})
             continue
@@ -18,18 +18,32 @@ class Settings(BaseSettings):
 
     # Session
     session_ttl_seconds: int = Field(1800, alias="SESSION_TTL_SECONDS")
+    # Room for one full tool loop: 2 * agent.MAX_ITERATIONS + 2 messages
+    max_history_messages: int = Field(40, ge=22, alias="MAX_HISTORY_MESSAGES")
 
     # Server
     host: str = Field("0.0.0.0", alias="HOST")
     port: int = Field(8000, alias="PORT")
+    # Sessions, caches and Huckleberry listeners are per process — see README before raising
+    workers: int = Field(1, alias="WORKERS")
 
     # Claude
     claude_model: str = Field("claude-opus-4-6", alias="CLAUDE_MODEL")
     claude_effort: Literal["low", "medium", "high", "max"] = Field("high", alias="CLAUDE_EFFORT")
+    # Send only intent-relevant tools for each turn
+    tool_routing_enabled: bool = Field(True, alias="TOOL_ROUTING_ENABLED")
+    # Ask Haiku when the local conversation-done heuristics are inconclusive
+    done_classifier_fallback: bool = Field(True, alias="DONE_CLASSIFIER_FALLBACK")
 
     # Conversation log
     conversation_log_path: str = Field("conversations.jsonl", alias="CONVERSATION_LOG_PATH")
 
+    # Semantic cache (requires the "semantic-cache" extra)
+    semantic_cache_enabled: bool = Field(False, alias="SEMANTIC_CACHE_ENABLED")
+    semantic_cache_model: str = Field("BAAI/bge-small-en", alias="SEMANTIC_CACHE_MODEL")
+    semantic_cache_threshold: float = Field(0.92, alias="SEMANTIC_CACHE_THRESHOLD")
+    semantic_cache_ttl_seconds: float = Field(60.0, alias="SEMANTIC_CACHE_TTL_SECONDS")
+
 
 # Single shared instance
 settings = Settings()
@@ -3,17 +3,39 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 
+import orjson
+
 from .config import settings
 
 log = logging.getLogger(__name__)
 
 _RETENTION_DAYS = 7
 
+# Dedicated single-thread executor for log file I/O.  One worker keeps appends
+# and pruning strictly ordered, so a write can never land between prune's
+# read of the file and its os.replace.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="convlog")
+
+# Encoded JSON lines waiting for log_writer_task
+_LOG_QUEUE: asyncio.Queue[bytes] = asyncio.Queue(maxsize=10000)
+
+# append_turn writes "ts" first with a fixed-width UTC timestamp, e.g.
+# {"ts":"2024-03-15T14:30:22.123456+00:00",...} — so it can be sliced out
+# of the raw line without parsing JSON.
+_TS_PREFIX = b'{"ts":"'
+_TS_START = len(_TS_PREFIX)
+_TS_END = _TS_START + len("2024-03-15T14:30:22.123456+00:00")
+
+
+def _utc_iso(dt: datetime) -> str:
+    return dt.isoformat(timespec="microseconds")
+
 
 def _log_path() -> Path:
     return Path(settings.conversation_log_path)
@@ -27,9 +49,12 @@ def append_turn(
     reply: str,
     conversation_done: bool,
 ) -> None:
-    """Append one turn as a JSON line to the conversation log."""
+    """Queue one turn to be appended as a JSON line to the conversation log.
+
+    Never blocks; log_writer_task performs the actual file write.
+    """
     record = {
-        "ts": datetime.now(timezone.utc).isoformat(),
+        "ts": _utc_iso(datetime.now(timezone.utc)),
         "session_id": session_id,
         "turn": turn,
         "user": user,
@@ -37,49 +62,120 @@ def append_turn(
         "conversation_done": conversation_done,
     }
     try:
-        with _log_path().open("a", encoding="utf-8") as f:
-            f.write(json.dumps(record) + "\n")
+        _LOG_QUEUE.put_nowait(orjson.dumps(record) + b"\n")
+    except asyncio.QueueFull:
+        log.warning("Conversation log queue full; dropping entry for session %s", session_id)
+
+
+def _drain_queue(batch: list[bytes]) -> None:
+    while not _LOG_QUEUE.empty():
+        batch.append(_LOG_QUEUE.get_nowait())
+
+
+async def log_writer_task() -> None:
+    """Background coroutine: write queued log lines, batching whatever has accumulated."""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _LOG_QUEUE.get()]
+        _drain_queue(batch)
+        await loop.run_in_executor(_executor, _write, b"".join(batch))
+
+
+def _write(data: bytes) -> None:
+    try:
+        with _log_path().open("ab") as f:
+            f.write(data)
     except Exception:
         log.exception("Failed to write conversation log entry")
 
 
+def _is_recent(ts: str, cutoff: datetime, cutoff_iso: str) -> bool:
+    """Return True if the ISO timestamp ``ts`` is at or after the cutoff.
+
+    Timestamps written by append_turn are UTC ISO-8601, which sort
+    lexicographically; anything else is parsed properly.
+    """
+    if ts.endswith("+00:00"):
+        return ts >= cutoff_iso
+    return datetime.fromisoformat(ts) >= cutoff
+
+
+def _raw_ts(line: bytes) -> bytes | None:
+    """Slice the UTC timestamp out of a line written by append_turn, or return None."""
+    if (
+        line.startswith(_TS_PREFIX)
+        and line[_TS_END:_TS_END + 1] == b'"'
+        and line[_TS_END - 6:_TS_END] == b"+00:00"
+    ):
+        return line[_TS_START:_TS_END]
+    return None
+
+
 def prune_old_entries() -> int:
-    """Remove entries older than _RETENTION_DAYS. Returns number of lines removed."""
+    """Remove entries older than _RETENTION_DAYS. Returns number of lines removed.
+
+    Streams the log into a sibling temp file and atomically swaps it in, so
+    memory use is constant regardless of log size.
+    """
     path = _log_path()
     if not path.exists():
         return 0
     cutoff = datetime.now(timezone.utc) - timedelta(days=_RETENTION_DAYS)
-    kept: list[str] = []
+    cutoff_iso = _utc_iso(cutoff)
+    cutoff_bytes = cutoff_iso.encode()
+    tmp_path = path.with_name(path.name + ".tmp")
     removed = 0
     try:
-        with path.open("r", encoding="utf-8") as f:
-            for raw in f:
-                line = raw.rstrip("\n")
+        with path.open("rb") as src, tmp_path.open("wb") as dst:
+            for raw in src:
+                line = raw.rstrip(b"\n")
                 if not line:
                     continue
-                try:
-                    record = json.loads(line)
-                    ts = datetime.fromisoformat(record["ts"])
-                    if ts >= cutoff:
-                        kept.append(line)
-                    else:
-                        removed += 1
-                except Exception:
-                    # Keep malformed lines to avoid silent data loss
-                    kept.append(line)
-        with path.open("w", encoding="utf-8") as f:
-            for line in kept:
-                f.write(line + "\n")
+                ts = _raw_ts(line)
+                if ts is not None:
+                    keep = ts >= cutoff_bytes
+                else:
+                    try:
+                        keep = _is_recent(orjson.loads(line)["ts"], cutoff, cutoff_iso)
+                    except Exception:
+                        # Keep malformed lines to avoid silent data loss
+                        keep = True
+                if keep:
+                    dst.write(line + b"\n")
+                else:
+                    removed += 1
+        if removed:
+            os.replace(tmp_path, path)
+        else:
+            tmp_path.unlink()
     except Exception:
         log.exception("Failed to prune conversation log")
+        tmp_path.unlink(missing_ok=True)
         return 0
     if removed:
         log.info("Pruned %d old conversation log entry/entries.", removed)
     return removed
 
 
+async def prune_old_entries_async() -> int:
+    """Run prune_old_entries on the log executor without blocking the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(_executor, prune_old_entries)
+
+
 async def prune_task() -> None:
     """Background coroutine: prune old log entries once every 24 hours."""
     while True:
         await asyncio.sleep(86400)
-        prune_old_entries()
+        await prune_old_entries_async()
+
+
+def shutdown_log() -> None:
+    """Flush queued and in-flight log writes and stop the log executor.
+
+    Call after log_writer_task has been cancelled.
+    """
+    batch: list[bytes] = []
+    _drain_queue(batch)
+    if batch:
+        _executor.submit(_write, b"".join(batch))
+    _executor.shutdown(wait=True)
@@ -7,8 +7,8 @@ state cache so the agent always has fresh baby status.
 from __future__ import annotations
 
 import asyncio
+import itertools
 import logging
-import threading
 import time
 import uuid
 from datetime import datetime
@@ -117,6 +117,10 @@ def _patch_huckleberry_models() -> None:
 _patch_huckleberry_models()
 
 
+# Event types fetched by get_history when the caller doesn't narrow them
+_HISTORY_TYPES = frozenset({"sleep", "feed", "diaper"})
+
+
 class HuckleberryManager:
     """Single shared manager instantiated once at app startup."""
 
@@ -125,9 +129,19 @@ class HuckleberryManager:
         self._session: aiohttp.ClientSession | None = None
         self._authenticated = False
         self._children: list[dict[str, Any]] = []  # [{uid, name, ...}, ...]
+        self._children_by_uid: dict[str, dict[str, Any]] = {}  # child_uid → child
+        self._primary_uid: str | None = None
+        self._children_public: tuple[dict[str, Any], ...] = ()  # /health projection
         self._state_cache: dict[str, dict[str, Any]] = {}  # child_uid → state
         self._feed_cache: dict[str, dict[str, Any]] = {}   # child_uid → feed
-        self._lock = threading.Lock()
+        # No lock: Firebase callbacks replace a child's entry with a single
+        # (GIL-atomic) dict assignment and never mutate it afterwards, so
+        # readers on the event loop always see a whole snapshot.
+        # child_uid → version stamp from a shared counter; next() on a count is
+        # atomic, so concurrent sleep/feed callbacks can never reuse a stamp.
+        self._versions = itertools.count(1)
+        self._state_version: dict[str, int] = {}
+        self._summary_cache: dict[str, tuple[int, str]] = {}  # child_uid → (version, summary)
 
     # ------------------------------------------------------------------
     # Lifecycle
@@ -164,6 +178,7 @@ class HuckleberryManager:
             self._state_cache[uid] = {}
             self._feed_cache[uid] = {}
 
+        self._index_children()
         log.info("Found %d child(ren): %s", len(self._children), [c.get("name") for c in self._children])
 
         for child in self._children:
@@ -194,15 +209,15 @@ class HuckleberryManager:
 
     def _make_state_callback(self, uid: str):
         def callback(data: FirebaseSleepDocumentData) -> None:
-            with self._lock:
-                self._state_cache[uid] = data.model_dump() if data else {}
+            self._state_cache[uid] = data.model_dump() if data else {}
+            self._state_version[uid] = next(self._versions)
             log.debug("State cache updated for child %s", uid)
         return callback
 
     def _make_feed_callback(self, uid: str):
         def callback(data: FirebaseFeedDocumentData) -> None:
-            with self._lock:
-                self._feed_cache[uid] = data.model_dump() if data else {}
+            self._feed_cache[uid] = data.model_dump() if data else {}
+            self._state_version[uid] = next(self._versions)
             log.debug("Feed cache updated for child %s", uid)
         return callback
 
@@ -218,22 +233,45 @@ class HuckleberryManager:
     def children(self) -> list[dict[str, Any]]:
         return self._children
 
+    @property
+    def children_public(self) -> tuple[dict[str, Any], ...]:
+        """Precomputed ``{uid, name}`` view of the children for status endpoints."""
+        return self._children_public
+
+    def _index_children(self) -> None:
+        """Rebuild uid lookups; call after any change to ``self._children``."""
+        self._children_by_uid = {c["uid"]: c for c in self._children}
+        self._primary_uid = self._children[0]["uid"] if self._children else None
+        self._children_public = tuple({"uid": c["uid"], "name": c.get("name")} for c in self._children)
+
     def get_primary_child_uid(self) -> str | None:
-        if not self._children:
-            return None
-        return self._children[0]["uid"]
+        return self._primary_uid
 
     def get_child_name(self, uid: str) -> str:
-        for c in self._children:
-            if c["uid"] == uid:
-                return c.get("name", uid)
-        return uid
+        child = self._children_by_uid.get(uid)
+        if child is None:
+            return uid
+        return child.get("name", uid)
 
     def summarize_current_state(self, uid: str) -> str:
-        """Return a brief human-readable state string for the system prompt."""
-        with self._lock:
-            state = self._state_cache.get(uid, {})
-            feed = self._feed_cache.get(uid, {})
+        """Return a brief human-readable state string for the system prompt.
+
+        Cached per child until a realtime callback bumps its version, so an
+        unchanged state yields the identical string object turn after turn.
+        """
+        # Read the version before the caches: a concurrent update then at
+        # worst caches newer state under an older version and is recomputed.
+        version = self._state_version.get(uid, 0)
+        cached = self._summary_cache.get(uid)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        summary = self._build_summary(uid)
+        self._summary_cache[uid] = (version, summary)
+        return summary
+
+    def _build_summary(self, uid: str) -> str:
+        state = self._state_cache.get(uid, {})
+        feed = self._feed_cache.get(uid, {})
 
         if not state and not feed:
             return "State not yet available (Firebase loading…)"
@@ -280,11 +318,10 @@ class HuckleberryManager:
     # ------------------------------------------------------------------
 
     async def get_current_state(self, child_uid: str) -> dict[str, Any]:
-        with self._lock:
-            return {
-                "state": dict(self._state_cache.get(child_uid, {})),
-                "feed": dict(self._feed_cache.get(child_uid, {})),
-            }
+        return {
+            "state": dict(self._state_cache.get(child_uid, {})),
+            "feed": dict(self._feed_cache.get(child_uid, {})),
+        }
 
     async def start_sleep(self, child_uid: str) -> dict[str, Any]:
         await self._api.start_sleep(child_uid)
@@ -449,7 +486,7 @@ class HuckleberryManager:
     ) -> dict[str, Any]:
         result: dict[str, Any] = {}
         errors: list[str] = []
-        types = set(event_types) if event_types else {"sleep", "feed", "diaper"}
+        types = frozenset(event_types) if event_types else _HISTORY_TYPES
 
         if "sleep" in types:
             try:
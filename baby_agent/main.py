@@ -4,18 +4,29 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import re
 from contextlib import asynccontextmanager
+from typing import Any
 
 import anthropic
+import orjson
 import uvicorn
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict
 
-from .agent import run_turn
+from .agent import MODEL, http_client, run_turn, used_only_read_tools
 from .config import settings
-from .conversation_log import append_turn, prune_old_entries, prune_task
+from .conversation_log import (
+    append_turn,
+    log_writer_task,
+    prune_old_entries_async,
+    prune_task,
+    shutdown_log,
+)
 from .huckleberry import manager
-from .session import session_cleanup_task, store
+from .semantic_cache import is_mutating, semantic_cache
+from .session import Session, start_session_cleanup, stop_session_cleanup, store
 
 logging.basicConfig(
     level=logging.INFO,
@@ -32,23 +43,29 @@ log = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     log.info("Starting up baby-agent…")
     await manager.startup()
-    prune_old_entries()
-    cleanup_task = asyncio.create_task(session_cleanup_task())
+    warmup_task = asyncio.create_task(_warmup())
+    await prune_old_entries_async()
+    start_session_cleanup()
     log_prune_task = asyncio.create_task(prune_task())
+    log_write_task = asyncio.create_task(log_writer_task())
     log.info("baby-agent ready.")
     yield
     log.info("Shutting down…")
-    cleanup_task.cancel()
+    warmup_task.cancel()
+    stop_session_cleanup()
     log_prune_task.cancel()
+    log_write_task.cancel()
     try:
-        await cleanup_task
+        await log_prune_task
     except asyncio.CancelledError:
         pass
     try:
-        await log_prune_task
+        await log_write_task
     except asyncio.CancelledError:
         pass
     await manager.teardown()
+    shutdown_log()
+    await http_client.aclose()
     log.info("Shutdown complete.")
 
 
@@ -56,7 +73,12 @@ async def lifespan(app: FastAPI):
 # App
 # ---------------------------------------------------------------------------
 
-app = FastAPI(title="baby-agent", version="0.1.0", lifespan=lifespan)
+app = FastAPI(
+    title="baby-agent",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 
 # ---------------------------------------------------------------------------
@@ -64,11 +86,15 @@ app = FastAPI(title="baby-agent", version="0.1.0", lifespan=lifespan)
 # ---------------------------------------------------------------------------
 
 class MessageRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     session_id: str
     message: str
 
 
 class MessageResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     session_id: str
     reply: str
     turn_count: int
@@ -79,7 +105,9 @@ class MessageResponse(BaseModel):
 # Conversation-done classifier
 # ---------------------------------------------------------------------------
 
-_classifier_client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
+_classifier_client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key, http_client=http_client)
+
+_CLASSIFIER_MODEL = "claude-haiku-4-5-20251001"
 
 _DONE_SYSTEM = (
     "You decide if a baby-care assistant conversation is finished. "
@@ -94,12 +122,36 @@ _DONE_SYSTEM = (
 )
 
 
-async def _is_conversation_done(user_message: str, agent_reply: str) -> bool:
+# The whole message is a sign-off / decline ("no thanks", "nope, that's it", "perfect").
+_DONE_FULL_RE = re.compile(
+    r"^\W*+(?:(?>(?:no|nope|nah|nothing(?: else)?|that'?s (?:it|all|everything)"
+    r"|that is (?:it|all)|i think that'?s it|(?:i'?m|we'?re|i am|we are) (?:good|all set|done)"
+    r"|all set|all good|done|got it|perfect|great|thanks|thank you|thx|bye|goodbye)\b)\W*+)+$",
+    re.IGNORECASE,
+)
+# The message ends with a closing phrase ("log a wet diaper, thanks").
+_DONE_TAIL_RE = re.compile(
+    r"\b(?:thanks|thank you|bye|goodbye|that'?s all|that'?s it|nothing else)\W*$",
+    re.IGNORECASE,
+)
+
+
+def _heuristic_done(user_message: str, agent_reply: str) -> bool | None:
+    """Classify locally; return None when the signals are ambiguous."""
+    if agent_reply.rstrip().endswith("?"):
+        return False  # the assistant is waiting on an answer
+    text = user_message.replace("\u2019", "'").strip()
+    if _DONE_FULL_RE.match(text) or _DONE_TAIL_RE.search(text):
+        return True
+    return None
+
+
+async def _classify_with_claude(user_message: str, agent_reply: str) -> bool:
     """Use Claude Haiku to decide whether the conversation should end."""
     prompt = f"User said: {user_message!r}\nAssistant replied: {agent_reply!r}"
     try:
         resp = await _classifier_client.messages.create(
-            model="claude-haiku-4-5-20251001",
+            model=_CLASSIFIER_MODEL,
             max_tokens=5,
             system=_DONE_SYSTEM,
             messages=[{"role": "user", "content": prompt}],
@@ -111,6 +163,40 @@ async def _is_conversation_done(user_message: str, agent_reply: str) -> bool:
         return False
 
 
+async def _is_conversation_done(user_message: str, agent_reply: str) -> bool:
+    """Decide whether the conversation should end.
+
+    Clear sign-offs and clarifying questions are handled by local regexes;
+    only ambiguous exchanges fall back to Claude Haiku (if enabled).
+    """
+    done = _heuristic_done(user_message, agent_reply)
+    if done is not None:
+        return done
+    if not settings.done_classifier_fallback:
+        return False
+    return await _classify_with_claude(user_message, agent_reply)
+
+
+async def _warmup() -> None:
+    """Send a 1-token request to each model so the first real turn skips cold-start costs.
+
+    Warms DNS, TLS and the shared connection pool on our side and the model
+    on Anthropic's; failures are logged and otherwise ignored.
+    """
+    async def ping(model: str) -> None:
+        try:
+            await _classifier_client.messages.create(
+                model=model,
+                max_tokens=1,
+                messages=[{"role": "user", "content": "hi"}],
+            )
+        except Exception:
+            log.warning("Warmup request for %s failed.", model, exc_info=True)
+
+    await asyncio.gather(ping(MODEL), ping(_CLASSIFIER_MODEL))
+    log.info("Model warmup complete.")
+
+
 # ---------------------------------------------------------------------------
 # Endpoints
 # ---------------------------------------------------------------------------
@@ -120,36 +206,88 @@ async def health():
     return {
         "status": "ok",
         "huckleberry_authenticated": manager.authenticated,
-        "active_children": [
-            {"uid": c["uid"], "name": c.get("name")} for c in manager.children
-        ],
-        "active_sessions": await store.active_count(),
+        "active_children": manager.children_public,
+        "active_sessions": store.active_count_fast(),
     }
 
 
-@app.post("/message", response_model=MessageResponse)
-async def message(req: MessageRequest):
-    if not req.message.strip():
-        raise HTTPException(status_code=400, detail="message must not be empty")
-
+def require_ready_manager() -> None:
+    """Dependency: reject /message calls until Huckleberry is usable."""
     if not manager.authenticated:
         raise HTTPException(status_code=503, detail="Huckleberry not authenticated")
 
     if not manager.children:
         raise HTTPException(status_code=503, detail="No children found in Huckleberry account")
 
-    session = await store.get_or_create(req.session_id)
 
-    try:
-        reply, updated_history = await run_turn(
-            user_message=req.message,
-            history=session.history,
-            manager=manager,
-        )
-    except Exception as exc:
-        log.exception("Agent error for session %s", req.session_id)
-        raise HTTPException(status_code=500, detail=f"Agent error: {exc}") from exc
+def _check_message(req: MessageRequest) -> None:
+    # isspace() avoids allocating a stripped copy of the message
+    if not req.message or req.message.isspace():
+        raise HTTPException(status_code=400, detail="message must not be empty")
 
+
+def _cache_context(req: MessageRequest, session: Session) -> str | None:
+    """Return the live-state context for semantic caching, or None to bypass the cache.
+
+    Only the opening message of a session is cacheable — follow-ups depend on
+    conversation history. Messages with obvious write verbs skip the lookup
+    as a cheap pre-filter; whether a reply is actually stored is decided by
+    the tools the turn called (see _cache_reply).
+    """
+    if not semantic_cache.enabled or session.history or is_mutating(req.message):
+        return None
+    return manager.summarize_current_state(manager.get_primary_child_uid() or "unknown")
+
+
+async def _cache_lookup(req: MessageRequest, session: Session) -> tuple[tuple[str, Any] | None, str | None]:
+    """Return ``(cache_key, cached_reply)``; cache_key is None when the turn bypasses the cache.
+
+    The key carries the embedding so a miss can be stored without embedding again.
+    """
+    context = _cache_context(req, session)
+    if context is None:
+        return None, None
+    vec = await semantic_cache.embed(context, req.message)
+    if vec is None:
+        return None, None
+    return (context, vec), semantic_cache.get(context, vec)
+
+
+def _cache_reply(
+    cache_key: tuple[str, Any] | None,
+    session: Session,
+    reply: str,
+    updated_history: list[dict[str, Any]],
+) -> None:
+    """Store a fresh reply if the turn made no Huckleberry writes; otherwise clear the cache.
+
+    Runs for every turn, including ones that bypassed the lookup: a write can
+    change cached answers (diaper counts, history) that the state context
+    doesn't capture.
+    """
+    # run_turn only appends to the history it was given
+    if not used_only_read_tools(updated_history[len(session.history):]):
+        semantic_cache.clear()
+        return
+    if cache_key is not None:
+        semantic_cache.put(*cache_key, reply)
+
+
+def _cached_history(req: MessageRequest, session: Session, reply: str) -> list[dict[str, Any]]:
+    return [
+        *session.history,
+        {"role": "user", "content": req.message},
+        {"role": "assistant", "content": reply},
+    ]
+
+
+async def _finish_turn(
+    req: MessageRequest,
+    session: Session,
+    reply: str,
+    updated_history: list[dict[str, Any]],
+) -> MessageResponse:
+    """Persist the turn, classify it, log it, and build the response."""
     session.history = updated_history
     session.turn_count += 1
     await store.save(session)
@@ -172,18 +310,121 @@ async def message(req: MessageRequest):
     )
 
 
+@app.post("/message", response_model=MessageResponse, dependencies=[Depends(require_ready_manager)])
+async def message(req: MessageRequest):
+    _check_message(req)
+
+    session = await store.get_or_create(req.session_id)
+
+    cache_key, cached = await _cache_lookup(req, session)
+    if cached is not None:
+        return await _finish_turn(req, session, cached, _cached_history(req, session, cached))
+
+    try:
+        reply, updated_history = await run_turn(
+            user_message=req.message,
+            history=session.history,
+            manager=manager,
+        )
+    except Exception as exc:
+        log.exception("Agent error for session %s", req.session_id)
+        semantic_cache.clear()  # the turn may have written before failing
+        raise HTTPException(status_code=500, detail=f"Agent error: {exc}") from exc
+
+    _cache_reply(cache_key, session, reply, updated_history)
+
+    return await _finish_turn(req, session, reply, updated_history)
+
+
+def _sse(payload: dict[str, Any]) -> bytes:
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+@app.post("/message/stream", dependencies=[Depends(require_ready_manager)])
+async def message_stream(req: MessageRequest):
+    """Same as /message, but streams reply text as Server-Sent Events.
+
+    Emits ``{"type": "delta", "iteration": n, "text": ...}`` events while Claude
+    is generating, then a final ``{"type": "done", ...}`` event carrying the
+    MessageResponse fields (or ``{"type": "error", "detail": ...}`` on failure).
+
+    A turn that calls tools makes several model calls, and any text written
+    before a tool call is streamed too. ``iteration`` numbers those calls from
+    0; when a delta arrives with a higher iteration, discard the text shown so
+    far. ``done.reply`` is the authoritative reply.
+    """
+    _check_message(req)
+
+    session = await store.get_or_create(req.session_id)
+
+    cache_key, cached = await _cache_lookup(req, session)
+
+    async def cached_events():
+        yield _sse({"type": "delta", "iteration": 0, "text": cached})
+        response = await _finish_turn(req, session, cached, _cached_history(req, session, cached))
+        yield _sse({"type": "done", **response.model_dump()})
+
+    async def events():
+        queue: asyncio.Queue[tuple[int, str] | None] = asyncio.Queue()
+
+        async def on_text(iteration: int, delta: str) -> None:
+            await queue.put((iteration, delta))
+
+        async def produce() -> tuple[str, list[dict[str, Any]]]:
+            try:
+                return await run_turn(
+                    user_message=req.message,
+                    history=session.history,
+                    manager=manager,
+                    on_text=on_text,
+                )
+            finally:
+                await queue.put(None)
+
+        turn_task = asyncio.create_task(produce())
+        try:
+            while (item := await queue.get()) is not None:
+                iteration, delta = item
+                yield _sse({"type": "delta", "iteration": iteration, "text": delta})
+
+            try:
+                reply, updated_history = await turn_task
+            except Exception as exc:
+                log.exception("Agent error for session %s", req.session_id)
+                semantic_cache.clear()  # the turn may have written before failing
+                yield _sse({"type": "error", "detail": f"Agent error: {exc}"})
+                return
+
+            _cache_reply(cache_key, session, reply, updated_history)
+
+            response = await _finish_turn(req, session, reply, updated_history)
+            yield _sse({"type": "done", **response.model_dump()})
+        finally:
+            if not turn_task.done():
+                turn_task.cancel()
+
+    if cached is not None:
+        return StreamingResponse(cached_events(), media_type="text/event-stream")
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 # ---------------------------------------------------------------------------
 # CLI entrypoint
 # ---------------------------------------------------------------------------
 
 def run() -> None:
-    uvicorn.run(
-        "baby_agent.main:app",
-        host=settings.host,
-        port=settings.port,
-        reload=False,
-        log_level="info",
-    )
+    options: dict[str, Any] = {
+        "host": settings.host,
+        "port": settings.port,
+        "log_level": "info",
+    }
+    if settings.workers > 1:
+        # Worker processes must each import the app, which needs an import string
+        uvicorn.run("baby_agent.main:app", reload=False, workers=settings.workers, **options)
+        return
+    # Single process: hand over the already-imported app object rather than an
+    # import string (which re-imports this module under `python -m baby_agent.main`)
+    uvicorn.Server(uvicorn.Config(app, **options)).run()
 
 
 if __name__ == "__main__":
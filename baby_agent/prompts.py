@@ -1,13 +1,13 @@
-"""System prompt template injected with live baby state each turn."""
+"""System prompt: a cacheable static prefix plus a small per-turn block with live baby state."""
 
 from datetime import datetime
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 
 _STATIC_TEMPLATE = """\
 You are a baby care assistant integrated with the Huckleberry app.
 Help parents track sleep, feeding, diapers, and growth.
 
-Current date/time: {current_datetime}
 Timezone: {timezone} — all times in tool results are already converted to this timezone. Report times in this timezone.
 
 Conversation flow:
@@ -36,28 +36,42 @@ Note: Henry may also be referred to as "Hank" — treat both names as the same c
 """
 
 _DYNAMIC_TEMPLATE = """\
+Current date/time: {current_datetime}
+
 Current Baby State (live):
 {current_state}\
 """
 
 
+@lru_cache(maxsize=8)
+def _static_block(child_name: str, child_uid: str, timezone: str) -> dict:
+    """Formatted prefix block; child and timezone are fixed for the process.
+
+    The returned dict is shared between calls and must not be mutated.
+    """
+    return {
+        "type": "text",
+        "text": _STATIC_TEMPLATE.format(
+            child_name=child_name,
+            child_uid=child_uid,
+            timezone=timezone,
+        ),
+        "cache_control": {"type": "ephemeral"},
+    }
+
+
 def build_system_prompt(current_state: str, child_name: str, child_uid: str, timezone: str) -> list[dict]:
-    """Return a list of system content blocks with cache_control on the stable prefix."""
+    """Return a list of system content blocks with cache_control on the stable prefix.
+
+    Everything that changes between turns (clock, live state) lives in the
+    trailing block so the prefix stays byte-identical and hits the prompt cache.
+    """
     tz = ZoneInfo(timezone)
     now_str = datetime.now(tz).strftime("%A, %B %-d, %Y at %-I:%M %p")
     return [
+        _static_block(child_name, child_uid, timezone),
         {
             "type": "text",
-            "text": _STATIC_TEMPLATE.format(
-                child_name=child_name,
-                child_uid=child_uid,
-                timezone=timezone,
-                current_datetime=now_str,
-            ),
-            "cache_control": {"type": "ephemeral"},
-        },
-        {
-            "type": "text",
-            "text": _DYNAMIC_TEMPLATE.format(current_state=current_state),
+            "text": _DYNAMIC_TEMPLATE.format(current_datetime=now_str, current_state=current_state),
         },
     ]
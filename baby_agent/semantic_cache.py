@@ -0,0 +1,168 @@
+"""Short-lived semantic cache for near-duplicate read-only questions.
+
+Parents ask the same handful of questions in many phrasings ("is he
+sleeping?", "current nap status?").  Keys are embeddings of
+``"{current_state}||{message}"``; when a new message embeds close enough to a
+recent one *and* the live baby state string is identical, the cached reply
+is returned without a Claude round-trip.
+
+Entries live for ``SEMANTIC_CACHE_TTL_SECONDS`` (default 60s) because replies
+describe live state.  The state context only covers the sleep/feed timers,
+so callers must ``clear()`` the cache after any turn that wrote to Huckleberry
+(a logged diaper changes "how many diapers today?" without changing the
+context) and only store replies from turns that made no writes.
+``is_mutating`` is a cheap pre-filter for obvious write requests ("log a
+diaper", "start sleep"), not a guarantee.
+
+Requires the optional ``semantic-cache`` extra (fastembed + numpy); if it is
+not installed, or the model fails to load or embed, the cache disables itself
+and every lookup is a miss.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import re
+import threading
+import time
+from typing import Any
+
+from .config import settings
+
+log = logging.getLogger(__name__)
+
+# Verbs that usually mean the user wants to change Huckleberry data. A pre-filter
+# only: many writes ("wet diaper", "he's asleep") don't contain any of these.
+_MUTATING_RE = re.compile(
+    r"\b(log|logged|record|add|track|start|started|stop|stopped|end|ended|pause|paused|"
+    r"resume|switch|cancel|complete|finish|finished|woke|nursed|fed|changed|weigh|weighed)\b",
+    re.IGNORECASE,
+)
+
+_MAX_ENTRIES = 1024
+
+
+def is_mutating(message: str) -> bool:
+    """Return True if the message obviously asks for a state-changing action."""
+    return _MUTATING_RE.search(message) is not None
+
+
+class SemanticCache:
+    """In-process cosine-similarity cache over fastembed sentence embeddings."""
+
+    def __init__(
+        self,
+        *,
+        enabled: bool,
+        model_name: str,
+        threshold: float,
+        ttl_seconds: float,
+    ) -> None:
+        self._enabled = enabled
+        self._model_name = model_name
+        self._threshold = threshold
+        self._ttl = ttl_seconds
+        self._model: Any = None
+        self._np: Any = None
+        self._load_lock = threading.Lock()  # first embeds may race in worker threads
+        # Parallel arrays: expiry (monotonic), state context, unit-norm vector, reply text
+        self._expires: list[float] = []
+        self._contexts: list[str] = []
+        self._vectors: list[Any] = []
+        self._replies: list[str] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    # ------------------------------------------------------------------
+    # Embedding
+    # ------------------------------------------------------------------
+
+    def _load(self) -> None:
+        import numpy as np
+        from fastembed import TextEmbedding  # type: ignore[import]
+
+        self._np = np
+        self._model = TextEmbedding(model_name=self._model_name)
+        log.info("Semantic cache loaded embedding model %s.", self._model_name)
+
+    def _embed_sync(self, text: str) -> Any:
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    self._load()
+        vec = next(iter(self._model.embed([text])))
+        norm = self._np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    async def embed(self, context: str, message: str) -> Any | None:
+        """Embed a (context, message) key for get/put, or return None if the cache is off.
+
+        The model is loaded on first use in the same worker-thread hop as the
+        embedding. Any failure (missing extra, model download, inference)
+        disables the cache for the rest of the process, so it only ever
+        degrades to a miss.
+        """
+        if not self._enabled:
+            return None
+        try:
+            return await asyncio.to_thread(self._embed_sync, f"{context}||{message}")
+        except Exception:
+            if self._enabled:
+                self._enabled = False
+                log.warning("Semantic cache failed to embed; disabling.", exc_info=True)
+            return None
+
+    # ------------------------------------------------------------------
+    # Store
+    # ------------------------------------------------------------------
+
+    def _drop_expired(self, now: float) -> None:
+        # TTL is constant and entries are appended in time order, so expired
+        # entries are always a prefix: find its end once and slice it off.
+        n = bisect.bisect_right(self._expires, now)
+        if n:
+            del self._expires[:n], self._contexts[:n], self._vectors[:n], self._replies[:n]
+
+    def get(self, context: str, vec: Any) -> str | None:
+        """Return a cached reply for a similar recent key with identical context, or None."""
+        self._drop_expired(time.monotonic())
+        candidates = [i for i, c in enumerate(self._contexts) if c == context]
+        if not candidates:
+            return None
+        scores = self._np.stack([self._vectors[i] for i in candidates]) @ vec
+        best = int(self._np.argmax(scores))
+        if scores[best] < self._threshold:
+            return None
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Semantic cache hit (cosine=%.3f).", float(scores[best]))
+        return self._replies[candidates[best]]
+
+    def clear(self) -> None:
+        """Drop every entry; call after any turn that may have changed Huckleberry data."""
+        self._expires.clear()
+        self._contexts.clear()
+        self._vectors.clear()
+        self._replies.clear()
+
+    def put(self, context: str, vec: Any, reply: str) -> None:
+        """Cache a reply under an embedding from embed() for the configured TTL."""
+        self._drop_expired(time.monotonic())
+        if len(self._vectors) >= _MAX_ENTRIES:
+            del self._expires[0], self._contexts[0], self._vectors[0], self._replies[0]
+        self._expires.append(time.monotonic() + self._ttl)
+        self._contexts.append(context)
+        self._vectors.append(vec)
+        self._replies.append(reply)
+
+
+# Module-level singleton
+semantic_cache = SemanticCache(
+    enabled=settings.semantic_cache_enabled,
+    model_name=settings.semantic_cache_model,
+    threshold=settings.semantic_cache_threshold,
+    ttl_seconds=settings.semantic_cache_ttl_seconds,
+)
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
 import logging
 import time
 from dataclasses import dataclass, field
@@ -13,60 +14,154 @@ from .config import settings
 log = logging.getLogger(__name__)
 
 
-@dataclass
+def _expiry() -> float:
+    return time.monotonic() + settings.session_ttl_seconds
+
+
+@dataclass(slots=True)
 class Session:
     session_id: str
     history: list[dict[str, Any]] = field(default_factory=list)
     turn_count: int = 0
-    last_active: float = field(default_factory=time.monotonic)
+    # Absolute monotonic deadline; sweeps compare against one sampled clock
+    expires_at: float = field(default_factory=_expiry)
 
     def touch(self) -> None:
-        self.last_active = time.monotonic()
+        self.expires_at = _expiry()
+
+    def is_expired(self, now: float | None = None) -> bool:
+        return self.expires_at <= (time.monotonic() if now is None else now)
+
+
+def _trim_history(history: list[dict[str, Any]], limit: int) -> list[dict[str, Any]]:
+    """Keep at most ``limit`` trailing messages, starting on a real user turn.
+
+    The cut is moved forward to the next plain-text user message so the
+    retained history never opens with an orphaned tool_result or assistant
+    message, which the API would reject. If the window holds no such message
+    (one long tool loop), the cut moves back to the last one instead, keeping
+    the latest turn whole even though that exceeds ``limit``.
+    """
+    if len(history) <= limit:
+        return history
+    cut = len(history) - limit
+    for start in range(cut, len(history)):
+        if _is_user_text(history[start]):
+            return history[start:]
+    for start in range(cut - 1, -1, -1):
+        if _is_user_text(history[start]):
+            return history[start:]
+    return history
+
+
+def _is_user_text(msg: dict[str, Any]) -> bool:
+    return msg.get("role") == "user" and isinstance(msg.get("content"), str)
 
-    def is_expired(self) -> bool:
-        return (time.monotonic() - self.last_active) > settings.session_ttl_seconds
+
+_SHARDS = 64  # power of two; see SessionStore._lock_for
 
 
 class SessionStore:
+    """Session map guarded by per-shard locks.
+
+    Plain dict reads/writes are atomic under the GIL, so only the
+    check-then-create in get_or_create needs a lock — and only one shard's,
+    so unrelated sessions never wait on each other.
+    """
+
     def __init__(self) -> None:
         self._sessions: dict[str, Session] = {}
-        self._lock = asyncio.Lock()
+        self._shards = [asyncio.Lock() for _ in range(_SHARDS)]
+        # Min-heap of (expires_at, session_id). Entries go stale when a session
+        # is touched or replaced; evict_expired skips those when they surface.
+        self._expiry: list[tuple[float, str]] = []
+
+    def _lock_for(self, session_id: str) -> asyncio.Lock:
+        return self._shards[hash(session_id) & (_SHARDS - 1)]
 
     async def get_or_create(self, session_id: str) -> Session:
-        async with self._lock:
+        async with self._lock_for(session_id):
             session = self._sessions.get(session_id)
             if session is None or session.is_expired():
                 if session is not None:
                     log.info("Session %s expired; starting fresh.", session_id)
                 session = Session(session_id=session_id)
                 self._sessions[session_id] = session
+                heapq.heappush(self._expiry, (session.expires_at, session_id))
             return session
 
     async def save(self, session: Session) -> None:
-        async with self._lock:
-            session.touch()
-            self._sessions[session.session_id] = session
+        session.history = _trim_history(session.history, settings.max_history_messages)
+        session.touch()
+        self._sessions[session.session_id] = session
+        heapq.heappush(self._expiry, (session.expires_at, session.session_id))
 
     async def active_count(self) -> int:
-        async with self._lock:
-            return sum(1 for s in self._sessions.values() if not s.is_expired())
+        now = time.monotonic()
+        return sum(1 for s in list(self._sessions.values()) if s.expires_at > now)
+
+    def active_count_fast(self) -> int:
+        """O(1) session count; may include expired sessions until the next eviction sweep."""
+        return len(self._sessions)
 
     async def evict_expired(self) -> int:
-        async with self._lock:
-            expired = [sid for sid, s in self._sessions.items() if s.is_expired()]
-            for sid in expired:
-                del self._sessions[sid]
-            return len(expired)
+        """Evict sessions whose deadline has passed; touches only heap entries that are due."""
+        now = time.monotonic()
+        evicted = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            _, sid = heapq.heappop(self._expiry)
+            session = self._sessions.get(sid)
+            if session is None or not session.is_expired(now):
+                continue  # stale entry: already gone, or touched since it was pushed
+            async with self._lock_for(sid):
+                # Re-check under the shard lock: the session may have been touched since
+                session = self._sessions.get(sid)
+                if session is not None and session.is_expired(now):
+                    del self._sessions[sid]
+                    evicted += 1
+        return evicted
 
 
 # Module-level singleton
 store = SessionStore()
 
 
-async def session_cleanup_task() -> None:
-    """Background coroutine: evict expired sessions every 60 seconds."""
-    while True:
-        await asyncio.sleep(60)
+_CLEANUP_INTERVAL = 60  # seconds
+
+_cleanup_handle: asyncio.TimerHandle | None = None
+_cleanup_runs: set[asyncio.Task] = set()  # strong refs so in-flight sweeps aren't GC'd
+
+
+async def _run_evict_once() -> None:
+    try:
         evicted = await store.evict_expired()
-        if evicted:
-            log.info("Evicted %d expired session(s).", evicted)
+    except Exception:
+        log.exception("Session eviction failed")
+        return
+    if evicted:
+        log.info("Evicted %d expired session(s).", evicted)
+
+
+def _schedule_evict(loop: asyncio.AbstractEventLoop) -> None:
+    global _cleanup_handle
+    task = loop.create_task(_run_evict_once())
+    _cleanup_runs.add(task)
+    task.add_done_callback(_cleanup_runs.discard)
+    _cleanup_handle = loop.call_later(_CLEANUP_INTERVAL, _schedule_evict, loop)
+
+
+def start_session_cleanup() -> None:
+    """Evict expired sessions every 60 seconds via a self-rescheduling timer."""
+    global _cleanup_handle
+    loop = asyncio.get_running_loop()
+    _cleanup_handle = loop.call_later(_CLEANUP_INTERVAL, _schedule_evict, loop)
+
+
+def stop_session_cleanup() -> None:
+    """Cancel the pending cleanup timer (and any sweep still running)."""
+    global _cleanup_handle
+    if _cleanup_handle is not None:
+        _cleanup_handle.cancel()
+        _cleanup_handle = None
+    for task in _cleanup_runs:
+        task.cancel()
@@ -2,8 +2,12 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
-from datetime import datetime, timedelta
+import re
+from collections.abc import Awaitable, Callable
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 from typing import Any
 from zoneinfo import ZoneInfo
 
@@ -30,11 +34,15 @@ from .huckleberry import HuckleberryManager
 
 log = logging.getLogger(__name__)
 
+# Timezone for history queries; settings are fixed for the process
+_TZ: ZoneInfo = ZoneInfo(settings.huckleberry_timezone)
+
 # ---------------------------------------------------------------------------
 # Tool definitions (Anthropic API format)
 # ---------------------------------------------------------------------------
 
-# Shared child_uid property used across many tools
+# Shared child_uid property used across many tools. Tools with no other inputs
+# reference it directly; it is never mutated, so no per-tool copy is needed.
 _CHILD_UID_PROP = {
     "child_uid": {
         "type": "string",
@@ -48,7 +56,7 @@ TOOL_DEFINITIONS: list[dict[str, Any]] = [
         "description": "Get the current live state for a child (sleep status, feeding status, etc.).",
         "input_schema": {
             "type": "object",
-            "properties": {**_CHILD_UID_PROP},
+            "properties": _CHILD_UID_PROP,
         },
     },
     # ---- Sleep ----
@@ -57,7 +65,7 @@ TOOL_DEFINITIONS: list[dict[str, Any]] = [
         "description": "Start tracking a sleep session for the child right now.",
         "input_schema": {
             "type": "object",
-            "properties": {**_CHILD_UID_PROP},
+            "properties": _CHILD_UID_PROP,
         },
     },
     {
@@ -65,7 +73,7 @@ TOOL_DEFINITIONS: list[dict[str, Any]] = [
         "description": "Pause the active sleep session (e.g., baby woke briefly).",
         "input_schema": {
             "type": "object",
-            "properties": {**_CHILD_UID_PROP},
+            "properties": _CHILD_UID_PROP,
         },
     },
     {
@@ -73,7 +81,7 @@ TOOL_DEFINITIONS: list[dict[str, Any]] = [
         "description": "Resume a paused sleep session.",
         "input_schema": {
             "type": "object",
-            "properties": {**_CHILD_UID_PROP},
+            "properties": _CHILD_UID_PROP,
         },
     },
     {
@@ -81,7 +89,7 @@ TOOL_DEFINITIONS: list[dict[str, Any]] = [
         "description": "End and save the active sleep session.",
         "input_schema": {
             "type": "object",
-            "properties": {**_CHILD_UID_PROP},
+            "properties": _CHILD_UID_PROP,
         },
     },
     {
@@ -89,7 +97,7 @@ TOOL_DEFINITIONS: list[dict[str, Any]] = [
         "description": "Cancel and discard the active sleep session without saving.",
         "input_schema": {
             "type": "object",
-            "properties": {**_CHILD_UID_PROP},
+            "properties": _CHILD_UID_PROP,
         },
     },
     # ---- Breastfeeding ----
@@ -113,7 +121,7 @@ TOOL_DEFINITIONS: list[dict[str, Any]] = [
         "description": "Pause the active feeding session.",
         "input_schema": {
             "type": "object",
-            "properties": {**_CHILD_UID_PROP},
+            "properties": _CHILD_UID_PROP,
         },
     },
     {
@@ -121,7 +129,7 @@ TOOL_DEFINITIONS: list[dict[str, Any]] = [
         "description": "Resume a paused feeding session.",
         "input_schema": {
             "type": "object",
-            "properties": {**_CHILD_UID_PROP},
+            "properties": _CHILD_UID_PROP,
         },
     },
     {
@@ -129,7 +137,7 @@ TOOL_DEFINITIONS: list[dict[str, Any]] = [
         "description": "Switch to the other breast during an active feeding session.",
         "input_schema": {
             "type": "object",
-            "properties": {**_CHILD_UID_PROP},
+            "properties": _CHILD_UID_PROP,
         },
     },
     {
@@ -137,7 +145,7 @@ TOOL_DEFINITIONS: list[dict[str, Any]] = [
         "description": "End and save the active feeding session.",
         "input_schema": {
             "type": "object",
-            "properties": {**_CHILD_UID_PROP},
+            "properties": _CHILD_UID_PROP,
         },
     },
     {
@@ -145,7 +153,7 @@ TOOL_DEFINITIONS: list[dict[str, Any]] = [
         "description": "Cancel and discard the active feeding session without saving.",
         "input_schema": {
             "type": "object",
-            "properties": {**_CHILD_UID_PROP},
+            "properties": _CHILD_UID_PROP,
         },
     },
     {
@@ -276,7 +284,7 @@ TOOL_DEFINITIONS: list[dict[str, Any]] = [
         "description": "Retrieve historical growth data for a child.",
         "input_schema": {
             "type": "object",
-            "properties": {**_CHILD_UID_PROP},
+            "properties": _CHILD_UID_PROP,
         },
     },
     {
@@ -305,15 +313,150 @@ TOOL_DEFINITIONS: list[dict[str, Any]] = [
                 },
             },
         },
-        "cache_control": {"type": "ephemeral"},
     },
 ]
 
+# Prompt-cache breakpoint on the final tool so the whole tool block is cached;
+# applied here rather than by hand so it stays last if tools are reordered.
+TOOL_DEFINITIONS[-1]["cache_control"] = {"type": "ephemeral"}
+
+
+# Tools that only read data; safe to deduplicate or run speculatively
+READ_ONLY_TOOLS: frozenset[str] = frozenset({"get_current_state", "get_growth_data", "get_history"})
+
+
+# ---------------------------------------------------------------------------
+# Intent routing — send only the tool groups a message can plausibly need
+# ---------------------------------------------------------------------------
+
+SLEEP_TOOLS = frozenset({"start_sleep", "pause_sleep", "resume_sleep", "complete_sleep", "cancel_sleep"})
+FEED_TOOLS = frozenset({
+    "start_feeding", "pause_feeding", "resume_feeding", "switch_feeding_side",
+    "complete_feeding", "cancel_feeding", "log_breastfeeding", "log_bottle_feeding",
+})
+DIAPER_TOOLS = frozenset({"log_diaper"})
+GROWTH_TOOLS = frozenset({"log_growth"})
+
+_TOOL_ROUTES: list[tuple[re.Pattern[str], frozenset[str]]] = [
+    (re.compile(r"\b(sleep\w*|slept|nap\w*|asleep|awake|woke|wake\w*|bed\w*|crib)\b", re.I), SLEEP_TOOLS),
+    (re.compile(
+        r"\b(feed\w*|fed|nurs\w*|breast\w*|bottle\w*|formula|milk|ate|eat\w*|side|left|right|"
+        r"oz|ounces?|ml|mls)\b", re.I), FEED_TOOLS),
+    (re.compile(r"\b(diapers?|pee\w*|poo\w*|wet|dirty|bm|blowout|soiled|dry)\b", re.I), DIAPER_TOOLS),
+    (re.compile(
+        r"\b(weigh\w*|height|length|tall|head|growth|grew|lbs?|pounds?|kg|kilos?|cm|inch\w*)\b", re.I),
+        GROWTH_TOOLS),
+]
+
+
+def _tool_subset(names: frozenset[str]) -> list[dict[str, Any]]:
+    # Filtering preserves definition order, so get_history (read-only, always
+    # included) stays last and keeps its cache_control breakpoint.
+    return [t for t in TOOL_DEFINITIONS if t["name"] in names]
+
+
+_subset_cache: dict[frozenset[str], list[dict[str, Any]]] = {}
+
+
+def select_tools(user_message: str) -> list[dict[str, Any]]:
+    """Return the tool definitions relevant to user_message.
+
+    Read-only tools are always included. If no write group matches, the
+    router has no confident guess and the full list is returned.
+    """
+    names = READ_ONLY_TOOLS
+    for pattern, group in _TOOL_ROUTES:
+        if pattern.search(user_message):
+            names = names | group
+    if names == READ_ONLY_TOOLS:
+        return TOOL_DEFINITIONS
+    subset = _subset_cache.get(names)
+    if subset is None:
+        subset = _subset_cache[names] = _tool_subset(names)
+    return subset
+
 
 # ---------------------------------------------------------------------------
 # Dispatcher
 # ---------------------------------------------------------------------------
 
+@lru_cache(maxsize=8)
+def _day_bounds(ordinal: int) -> tuple[int, int]:
+    """Epoch seconds for local midnight at the start and end of the given day."""
+    d = date.fromordinal(ordinal)
+    start_dt = datetime(d.year, d.month, d.day, tzinfo=_TZ)
+    end_dt = start_dt + timedelta(days=1)
+    return int(start_dt.timestamp()), int(end_dt.timestamp())
+
+
+async def _get_history(manager: HuckleberryManager, child_uid: str, inputs: dict[str, Any]) -> dict[str, Any]:
+    date_str = inputs.get("date")
+    if date_str:
+        try:
+            d = date.fromisoformat(date_str)
+        except ValueError:
+            # strptime also accepts un-padded dates like "2024-3-5"
+            d = datetime.strptime(date_str, "%Y-%m-%d").date()
+    else:
+        d = datetime.now(_TZ).date()
+    start_ts, end_ts = _day_bounds(d.toordinal())
+    result = await manager.get_history(
+        child_uid,
+        start_ts,
+        end_ts,
+        event_types=inputs.get("event_types"),
+    )
+    return _localize_timestamps(result, _TZ)
+
+
+# Tool name → handler(manager, child_uid, inputs) returning an awaitable result
+_Handler = Callable[[HuckleberryManager, str, dict[str, Any]], Awaitable[dict[str, Any]]]
+
+_DISPATCH: dict[str, _Handler] = {
+    "get_current_state": lambda m, uid, i: m.get_current_state(uid),
+    "start_sleep": lambda m, uid, i: m.start_sleep(uid),
+    "pause_sleep": lambda m, uid, i: m.pause_sleep(uid),
+    "resume_sleep": lambda m, uid, i: m.resume_sleep(uid),
+    "complete_sleep": lambda m, uid, i: m.complete_sleep(uid),
+    "cancel_sleep": lambda m, uid, i: m.cancel_sleep(uid),
+    "start_feeding": lambda m, uid, i: m.start_feeding(uid, side=i.get("side")),
+    "pause_feeding": lambda m, uid, i: m.pause_feeding(uid),
+    "resume_feeding": lambda m, uid, i: m.resume_feeding(uid),
+    "switch_feeding_side": lambda m, uid, i: m.switch_feeding_side(uid),
+    "complete_feeding": lambda m, uid, i: m.complete_feeding(uid),
+    "cancel_feeding": lambda m, uid, i: m.cancel_feeding(uid),
+    "log_breastfeeding": lambda m, uid, i: m.log_breastfeeding(
+        uid,
+        left_duration_minutes=float(i.get("left_duration_minutes") or 0),
+        right_duration_minutes=float(i.get("right_duration_minutes") or 0),
+        last_side=i.get("last_side"),
+    ),
+    "log_bottle_feeding": lambda m, uid, i: m.log_bottle_feeding(
+        uid,
+        amount=float(i["amount"]),
+        bottle_type=i["bottle_type"],
+        units=i["units"],
+    ),
+    "log_diaper": lambda m, uid, i: m.log_diaper(
+        uid,
+        mode=i["mode"],
+        pee_amount=i.get("pee_amount"),
+        poo_amount=i.get("poo_amount"),
+        color=i.get("color"),
+        consistency=i.get("consistency"),
+    ),
+    "log_growth": lambda m, uid, i: m.log_growth(
+        uid,
+        weight=i.get("weight"),
+        height=i.get("height"),
+        head=i.get("head"),
+        units=i.get("units", "imperial"),
+    ),
+    "get_growth_data": lambda m, uid, i: m.get_growth_data(uid),
+    "get_history": _get_history,
+}
+
+
 async def dispatch_tool(
     name: str,
     inputs: dict[str, Any],
@@ -325,102 +468,15 @@ async def dispatch_tool(
     if child_uid is None:
         return {"error": "No child found. Please check Huckleberry setup."}
 
-    try:
-        match name:
-            case "get_current_state":
-                return await manager.get_current_state(child_uid)
-
-            case "start_sleep":
-                return await manager.start_sleep(child_uid)
-
-            case "pause_sleep":
-                return await manager.pause_sleep(child_uid)
-
-            case "resume_sleep":
-                return await manager.resume_sleep(child_uid)
-
-            case "complete_sleep":
-                return await manager.complete_sleep(child_uid)
-
-            case "cancel_sleep":
-                return await manager.cancel_sleep(child_uid)
-
-            case "start_feeding":
-                return await manager.start_feeding(child_uid, side=inputs.get("side"))
-
-            case "pause_feeding":
-                return await manager.pause_feeding(child_uid)
-
-            case "resume_feeding":
-                return await manager.resume_feeding(child_uid)
-
-            case "switch_feeding_side":
-                return await manager.switch_feeding_side(child_uid)
-
-            case "complete_feeding":
-                return await manager.complete_feeding(child_uid)
-
-            case "cancel_feeding":
-                return await manager.cancel_feeding(child_uid)
-
-            case "log_breastfeeding":
-                return await manager.log_breastfeeding(
-                    child_uid,
-                    left_duration_minutes=float(inputs.get("left_duration_minutes") or 0),
-                    right_duration_minutes=float(inputs.get("right_duration_minutes") or 0),
-                    last_side=inputs.get("last_side"),
-                )
-
-            case "log_bottle_feeding":
-                return await manager.log_bottle_feeding(
-                    child_uid,
-                    amount=float(inputs["amount"]),
-                    bottle_type=inputs["bottle_type"],
-                    units=inputs["units"],
-                )
-
-            case "log_diaper":
-                return await manager.log_diaper(
-                    child_uid,
-                    mode=inputs["mode"],
-                    pee_amount=inputs.get("pee_amount"),
-                    poo_amount=inputs.get("poo_amount"),
-                    color=inputs.get("color"),
-                    consistency=inputs.get("consistency"),
-                )
-
-            case "log_growth":
-                return await manager.log_growth(
-                    child_uid,
-                    weight=inputs.get("weight"),
-                    height=inputs.get("height"),
-                    head=inputs.get("head"),
-                    units=inputs.get("units", "imperial"),
-                )
-
-            case "get_growth_data":
-                return await manager.get_growth_data(child_uid)
-
-            case "get_history":
-                tz = ZoneInfo(settings.huckleberry_timezone)
-                date_str = inputs.get("date")
-                if date_str:
-                    d = datetime.strptime(date_str, "%Y-%m-%d").date()
-                else:
-                    d = datetime.now(tz).date()
-                start_dt = datetime(d.year, d.month, d.day, tzinfo=tz)
-                end_dt = start_dt + timedelta(days=1)
-                result = await manager.get_history(
-                    child_uid,
-                    int(start_dt.timestamp()),
-                    int(end_dt.timestamp()),
-                    event_types=inputs.get("event_types"),
-                )
-                return _localize_timestamps(result, tz)
-
-            case _:
-                return {"error": f"Unknown tool: {name}"}
+    handler = _DISPATCH.get(name)
+    if handler is None:
+        return {"error": f"Unknown tool: {name}"}
 
+    try:
+        return await handler(manager, child_uid, inputs)
+    except asyncio.CancelledError:
+        # Turn was cancelled (e.g. streaming client went away) — never report it as a tool error
+        raise
     except Exception as exc:
         log.exception("Tool %s raised an exception", name)
         return {"error": str(exc)}